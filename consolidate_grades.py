@@ -19,43 +19,87 @@ Workflow (per assignment file with numeric prefix other than 00):
 from __future__ import annotations
 
 import argparse
+import os
 import re
 import shutil
+import socket
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.worksheet import Worksheet
 
 
 BANNED_HEADERS = ["username", "score", "feedback", "graded by", "time graded"]
 HEADER_TEXT_ROTATION = 90
+HEADER_SCAN_ROWS = 40
+HEADER_SCAN_COLS = 6
+UNOSERVER_HOST = "127.0.0.1"
+UNOSERVER_PORT = 2003  # unoserver's default listening port
+
+WEIGHT_AT_END_RE = re.compile(r"(\d+(?:\.\d+)?)%\s*$")
+WEIGHT_ANYWHERE_RE = re.compile(r"(\d+(?:\.\d+)?)%")
+ASSIGNMENT_PREFIX_RE = re.compile(r"(?i)^assignment\s*[:-]?\s*")
+
+# Shared cell styles, built once and assigned by reference to every written cell.
+TITLE_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+HEADER_ALIGN = Alignment(text_rotation=HEADER_TEXT_ROTATION, horizontal="center", vertical="bottom", wrap_text=True)
+GROUP_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+DATA_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+NAME_ALIGN = Alignment(horizontal="left", vertical="center")
+DIST_HEADER_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+TITLE_FONT = Font(bold=True, size=13)
+BOLD_FONT = Font(bold=True, size=11)
+
+TITLE_FILL = PatternFill("solid", fgColor="BFBFBF")  # dark gray
+HEADER_FILL = PatternFill("solid", fgColor="E6E6E6")  # light gray
+GROUP_FILL = PatternFill("solid", fgColor="D0D0D0")  # mid gray
+STRIPE_FILL = PatternFill("solid", fgColor="F7F7F7")  # zebra alternate
+
+THIN = Side(style="thin", color="999999")
+THICK = Side(style="medium", color="666666")
+BORDER = Border(top=THIN, bottom=THIN, left=THIN, right=THIN)
+RIGHT_THICK_BORDER = Border(top=THIN, bottom=THIN, left=THIN, right=THICK)
+
+
+def rows_containing(df: pd.DataFrame, text: str) -> np.ndarray:
+    """Boolean mask of rows where any cell contains ``text`` (case-insensitive), scanned column by column."""
+    mask = np.zeros(len(df), dtype=bool)
+    for _, col in df.items():
+        mask |= col.astype(str).str.contains(text, case=False, na=False, regex=False).to_numpy()
+    return mask
 
 
 def find_header_row(df: pd.DataFrame) -> int:
     """Locate the row index that contains the rubric header ("First name")."""
-    matches = df[
-        df.apply(
-            lambda row: row.astype(str)
-            .str.contains("First name", case=False, na=False)
-            .any(),
-            axis=1,
-        )
-    ]
-    if matches.empty:
-        raise ValueError("Could not locate the header row with 'First name'.")
-    return matches.index[0]
+    # Moodle puts the header in the top-left corner; only scan the whole sheet if it is not there.
+    for window in (df.iloc[:HEADER_SCAN_ROWS, :HEADER_SCAN_COLS], df):
+        mask = rows_containing(window, "First name")
+        if mask.any():
+            return window.index[np.argmax(mask)]
+    raise ValueError("Could not locate the header row with 'First name'.")
 
 
 def normalize_title(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip().lower()
+    return " ".join(text.split()).lower()
+
 
+def find_rubric_csv(path: Path, csv_index: Dict[str, Path]) -> Optional[Path]:
+    """Locate the rubric CSV that matches an assignment XLSX (without numeric prefix).
 
-def find_rubric_csv(path: Path) -> Optional[Path]:
-    """Locate the rubric CSV that matches an assignment XLSX (without numeric prefix)."""
+    ``csv_index`` maps the stem of every CSV in the export folder to its path, built once per run.
+    """
     name = path.name
     base_part = name.split("-", 1)[1] if "-" in name else path.stem
     base_part = base_part.rsplit(".", 1)[0].strip()
@@ -65,10 +109,7 @@ def find_rubric_csv(path: Path) -> Optional[Path]:
     alt = path.with_name(f"{base_part}.csv")
     if alt.exists():
         return alt
-    for candidate in path.parent.glob("*.csv"):
-        if base_part in candidate.stem:
-            return candidate
-    return None
+    return next((candidate for stem, candidate in csv_index.items() if base_part in stem), None)
 
 
 def load_criterion_labels(csv_path: Path, expected_count: int) -> List[str]:
@@ -77,70 +118,51 @@ def load_criterion_labels(csv_path: Path, expected_count: int) -> List[str]:
         df = pd.read_csv(csv_path)
     except Exception:
         return []
-    labels: List[str] = []
-    for col in df.columns:
-        if len(labels) >= expected_count:
-            break
-        if pd.notna(col) and str(col).strip():
-            labels.append(str(col).strip())
-        for val in df[col]:
-            if len(labels) >= expected_count:
-                break
-            if pd.isna(val):
-                continue
-            text = str(val).strip()
-            if text:
-                labels.append(text)
-    return labels[:expected_count]
+    # Stack the header above the values and ravel column-major: header 1, its values, header 2, ...
+    cells = np.vstack([df.columns.to_numpy(dtype=object), df.to_numpy(dtype=object)]).ravel(order="F")
+    texts = (str(val).strip() for val in cells[pd.notna(cells)])
+    return list(islice((text for text in texts if text), expected_count))
 
 
 def extract_weight(title: str) -> Optional[str]:
-    match = re.search(r"(\d+(?:\.\d+)?)%\s*$", title)
+    match = WEIGHT_AT_END_RE.search(title)
     if match:
         return f"{match.group(1)}%"
-    match = re.search(r"(\d+(?:\.\d+)?)%", title)
+    match = WEIGHT_ANYWHERE_RE.search(title)
     return f"{match.group(1)}%" if match else None
 
 
 def strip_assignment_word(title: str) -> str:
-    cleaned = re.sub(r"(?i)^assignment\s*[:-]?\s*", "", title).strip()
+    cleaned = ASSIGNMENT_PREFIX_RE.sub("", title).strip()
     return cleaned or title
 
 
 def remove_raffi_rows(df: pd.DataFrame) -> pd.DataFrame:
-    mask = df.apply(
-        lambda row: row.astype(str).str.contains("Raffi", case=False, na=False).any(),
-        axis=1,
-    )
-    return df[~mask]
+    return df[~rows_containing(df, "Raffi")]
 
 
-def build_roster(course_df: pd.DataFrame, assignment_paths: Iterable[Path]) -> List[Tuple[str, str]]:
-    roster: List[Tuple[str, str]] = []
-    seen = set()
+def read_assignment_sheet(path: Path) -> pd.DataFrame:
+    """Load a rubric export without headers."""
+    return pd.read_excel(path, header=None, engine="calamine")
 
-    def add_name(first: str, last: str) -> None:
-        key = (first.strip(), last.strip())
-        if key[0] and key[1] and key not in seen:
-            roster.append(key)
-            seen.add(key)
 
-    for first, last in zip(course_df["First name"], course_df["Last name"]):
-        add_name(str(first), str(last))
+def assignment_names(raw: pd.DataFrame) -> pd.DataFrame:
+    """The (First name, Last name) block below the header of a raw rubric export, Raffi rows removed."""
+    header_row = find_header_row(raw)
+    names = raw.iloc[header_row + 1 :, :2].dropna(how="all")
+    return remove_raffi_rows(names).set_axis(["First name", "Last name"], axis=1)
 
-    for path in assignment_paths:
-        raw = pd.read_excel(path, header=None, engine="openpyxl")
-        header_row = find_header_row(raw)
-        names = raw.iloc[header_row + 1 :, :2].dropna(how="all")
-        names = remove_raffi_rows(names)
-        for _, row in names.iterrows():
-            add_name(str(row.iloc[0]), str(row.iloc[1]))
 
-    return roster
+def build_roster(course_df: pd.DataFrame, name_blocks: Iterable[pd.DataFrame]) -> List[Tuple[str, str]]:
+    """Ordered, de-duplicated (first, last) names from the course totals followed by every rubric export."""
+    frames = [course_df[["First name", "Last name"]], *name_blocks]
+    names = pd.concat(frames, ignore_index=True).astype(str).apply(lambda col: col.str.strip())
+    names = names[names.notna().all(axis=1) & (names["First name"] != "") & (names["Last name"] != "")]
+    return list(names.drop_duplicates().itertuples(index=False, name=None))
 
 
 def load_course_totals(course_path: Path) -> pd.DataFrame:
-    course_df = pd.read_excel(course_path, engine="openpyxl")
+    course_df = pd.read_excel(course_path, engine="calamine")
     course_df = course_df[course_df["First name"].notna()]
     course_df[["First name", "Last name"]] = course_df[["First name", "Last name"]].apply(
         lambda col: col.astype(str).str.strip()
@@ -149,22 +171,39 @@ def load_course_totals(course_path: Path) -> pd.DataFrame:
     return course_df
 
 
-def find_course_grade_columns(course_df: pd.DataFrame, assignment_title: str) -> Tuple[Optional[str], Optional[str]]:
+GradeColumns = Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]
+
+
+def index_grade_columns(course_df: pd.DataFrame) -> GradeColumns:
+    """Normalize the course column names once, split into (percentage, letter) lists of (column, normalized)."""
+    normalized = [(col, normalize_title(str(col))) for col in course_df.columns]
+    perc_cols = [(col, norm) for col, norm in normalized if "(percentage)" in norm]
+    letter_cols = [(col, norm) for col, norm in normalized if "(letter)" in norm]
+    return perc_cols, letter_cols
+
+
+def find_course_grade_columns(grade_columns: GradeColumns, assignment_title: str) -> Tuple[Optional[str], Optional[str]]:
     perc_col = None
     letter_col = None
     normalized_title = normalize_title(assignment_title)
     stripped_title = normalize_title(strip_assignment_word(assignment_title))
 
-    for col in course_df.columns:
-        col_norm = normalize_title(str(col))
-        if "(percentage)" in col_norm and (normalized_title in col_norm or stripped_title in col_norm):
+    perc_cols, letter_cols = grade_columns
+    for col, col_norm in perc_cols:
+        if normalized_title in col_norm or stripped_title in col_norm:
             perc_col = col
-        if "(letter)" in col_norm and (normalized_title in col_norm or stripped_title in col_norm):
+    for col, col_norm in letter_cols:
+        if normalized_title in col_norm or stripped_title in col_norm:
             letter_col = col
     return perc_col, letter_col
 
 
 def parse_course_percentage(value):
+    # Numeric cells (the usual case straight from Excel) skip the string handling.
+    if isinstance(value, float):
+        return value if value == value else pd.NA  # NaN is the only float unequal to itself
+    if isinstance(value, int):
+        return float(value)
     if pd.isna(value):
         return pd.NA
     if isinstance(value, str):
@@ -181,8 +220,12 @@ def align_to_roster(df: pd.DataFrame, roster: List[Tuple[str, str]]) -> pd.DataF
     return aligned.reset_index()
 
 
-def parse_assignment(path: Path, course_df: pd.DataFrame, roster: List[Tuple[str, str]]):
-    raw = pd.read_excel(path, header=None, engine="openpyxl")
+def parse_assignment(path: Path, raw: pd.DataFrame, grade_columns: GradeColumns, csv_index: Dict[str, Path]):
+    """Clean one rubric export into named criteria plus a weighted total.
+
+    Course grades and roster alignment need the course frame and the full roster, so they
+    are left to ``finish_assignment`` in the parent process.
+    """
     assignment_title = str(raw.iloc[1, 0]).strip()
     weight = extract_weight(assignment_title)
     header_row = find_header_row(raw)
@@ -204,7 +247,7 @@ def parse_assignment(path: Path, course_df: pd.DataFrame, roster: List[Tuple[str
     definition_count = sum(
         1 for label in cleaned.columns if isinstance(label, str) and label.lower() == "definition"
     )
-    csv_path = find_rubric_csv(path)
+    csv_path = find_rubric_csv(path, csv_index)
     criterion_labels = load_criterion_labels(csv_path, definition_count) if csv_path else []
     criterion_idx = 0
     for label in cleaned.columns:
@@ -227,31 +270,15 @@ def parse_assignment(path: Path, course_df: pd.DataFrame, roster: List[Tuple[str
     cleaned["First name"] = cleaned["First name"].astype(str).str.strip()
     cleaned["Last name"] = cleaned["Last name"].astype(str).str.strip()
 
-    for col in criterion_cols:
-        cleaned[col] = pd.to_numeric(cleaned[col], errors="coerce")
+    to_convert = [col for col in criterion_cols if not pd.api.types.is_numeric_dtype(cleaned[col])]
+    if to_convert:
+        cleaned[to_convert] = cleaned[to_convert].apply(pd.to_numeric, errors="coerce")
 
     total_label = f"Total - {weight}" if weight else "Total"
-    cleaned[total_label] = cleaned[criterion_cols].sum(axis=1, numeric_only=True)
-
-    perc_col, letter_col = find_course_grade_columns(course_df, assignment_title)
-    course_indexed = course_df.set_index(["First name", "Last name"])
-
-    def lookup(name_tuple: Tuple[str, str], column: Optional[str]):
-        if column is None or name_tuple not in course_indexed.index:
-            return pd.NA
-        return course_indexed.at[name_tuple, column]
-
-    cleaned["Total - 100"] = [
-        parse_course_percentage(lookup((fn, ln), perc_col)) for fn, ln in zip(cleaned["First name"], cleaned["Last name"])
-    ]
-    cleaned["Total - Letter"] = [
-        lookup((fn, ln), letter_col) for fn, ln in zip(cleaned["First name"], cleaned["Last name"])
-    ]
-
-    aligned = align_to_roster(cleaned, roster)
+    # nansum keeps the pandas semantics: blank criteria count as 0, an all-blank row totals 0.
+    cleaned[total_label] = np.nansum(cleaned[criterion_cols].to_numpy(dtype=float), axis=1)
 
     columns_order = ["First name", "Last name"] + criterion_cols + [total_label, "Total - 100", "Total - Letter"]
-    aligned = aligned[columns_order]
     write_columns = criterion_cols + [total_label, "Total - 100", "Total - Letter"]
 
     return {
@@ -260,10 +287,37 @@ def parse_assignment(path: Path, course_df: pd.DataFrame, roster: List[Tuple[str
         "weight": weight,
         "columns": columns_order,
         "write_columns": write_columns,
-        "df": aligned,
+        "course_columns": find_course_grade_columns(grade_columns, assignment_title),
+        "df": cleaned[["First name", "Last name"] + criterion_cols + [total_label]],
     }
 
 
+def load_assignment(path: Path, grade_columns: GradeColumns, csv_index: Dict[str, Path]) -> dict:
+    """Read and parse one rubric export; this is the unit of work handed to the process pool.
+
+    Only the path and the two small lookup tables are sent to the worker. The parsed block,
+    its name block and the course-name cell come back; the raw sheet never leaves the worker.
+    """
+    raw = read_assignment_sheet(path)
+    assignment = parse_assignment(path, raw, grade_columns, csv_index)
+    assignment["names"] = assignment_names(raw)
+    assignment["course_name"] = read_course_name(raw)
+    return assignment
+
+
+def finish_assignment(assignment: dict, course_indexed: pd.DataFrame, roster: List[Tuple[str, str]]) -> dict:
+    """Attach the course percentage/letter to a parsed block and align it to the roster."""
+    cleaned = assignment["df"].copy()
+    perc_col, letter_col = assignment.pop("course_columns")
+    key = pd.MultiIndex.from_arrays([cleaned["First name"], cleaned["Last name"]])
+    course_grades = course_indexed[[col for col in (perc_col, letter_col) if col]].reindex(key)
+    cleaned["Total - 100"] = course_grades[perc_col].map(parse_course_percentage).to_numpy() if perc_col else pd.NA
+    cleaned["Total - Letter"] = course_grades[letter_col].to_numpy() if letter_col else pd.NA
+
+    assignment["df"] = align_to_roster(cleaned, roster)[assignment["columns"]]
+    return assignment
+
+
 def course_total_columns(course_df: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
     perc_col = None
     letter_col = None
@@ -276,93 +330,73 @@ def course_total_columns(course_df: pd.DataFrame) -> Tuple[Optional[str], Option
     return perc_col, letter_col
 
 
-def course_totals_for_roster(course_df: pd.DataFrame, roster: List[Tuple[str, str]]):
-    perc_col, letter_col = course_total_columns(course_df)
-    indexed = course_df.set_index(["First name", "Last name"])
-    perc_values = []
-    letter_values = []
-    for fn, ln in roster:
-        key = (fn, ln)
-        if perc_col and key in indexed.index:
-            perc_values.append(parse_course_percentage(indexed.at[key, perc_col]))
-        else:
-            perc_values.append(pd.NA)
-        if letter_col and key in indexed.index:
-            letter_values.append(indexed.at[key, letter_col])
-        else:
-            letter_values.append(pd.NA)
+def course_totals_for_roster(
+    course_indexed: pd.DataFrame, total_columns: Tuple[Optional[str], Optional[str]], roster: List[Tuple[str, str]]
+):
+    perc_col, letter_col = total_columns
+    key = pd.MultiIndex.from_tuples(roster, names=["First name", "Last name"])
+    course_grades = course_indexed[[col for col in (perc_col, letter_col) if col]].reindex(key)
+    missing = [pd.NA] * len(roster)
+    perc_values = course_grades[perc_col].map(parse_course_percentage).tolist() if perc_col else missing
+    letter_values = course_grades[letter_col].tolist() if letter_col else missing
     return perc_values, letter_values
 
 
-def read_course_name(sample_rubric_path: Path) -> str:
-    raw = pd.read_excel(sample_rubric_path, header=None, engine="openpyxl")
+def read_course_name(raw: pd.DataFrame) -> str:
     value = raw.iloc[0, 0]
     return str(value).strip() if pd.notna(value) else "Course"
 
 
-def write_workbook(assignments: List[dict], roster: List[Tuple[str, str]], course_df: pd.DataFrame, course_name: str, output_path: Path) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Consolidated"
+def write_workbook(
+    assignments: List[dict],
+    roster: List[Tuple[str, str]],
+    course_totals: Tuple[list, list],
+    course_name: str,
+    output_path: Path,
+) -> None:
+    # Write-only mode streams rows straight to disk, so every cell (styles, stripes,
+    # separators) and every sheet-level setting must be decided before appending.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Consolidated")
 
     total_columns_count = 2 + sum(len(a["write_columns"]) for a in assignments) + 2
 
     title_row = 1
     group_row = 2
     header_row = 3  # header row
-    data_start = header_row + 1
     col_offset = 3  # start after name columns
 
-    header_alignment = Alignment(text_rotation=HEADER_TEXT_ROTATION, horizontal="center", vertical="bottom", wrap_text=True)
-    group_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    data_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    name_alignment = Alignment(horizontal="left", vertical="center")
-    dist_header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    title_fill = PatternFill("solid", fgColor="BFBFBF")  # dark gray
-    header_fill = PatternFill("solid", fgColor="E6E6E6")  # light gray
-    group_fill = PatternFill("solid", fgColor="D0D0D0")  # mid gray
-    stripe_fill = PatternFill("solid", fgColor="F7F7F7")  # zebra alternate
-    thin = Side(style="thin", color="999999")
-    thick = Side(style="medium", color="666666")
-    border = Border(top=thin, bottom=thin, left=thin, right=thin)
-
-    def clean_value(value):
-        return None if pd.isna(value) else value
-
-    def set_cell(cell, value, align=None, fill=None, bold=False, number=False, num_format=None, border_on=True):
-        cell.value = clean_value(value)
+    def set_cell(value, align=None, fill=None, bold=False, num_format=None, border_on=True):
+        cell = WriteOnlyCell(ws, value=value)
         if align:
             cell.alignment = align
         if fill:
             cell.fill = fill
         if bold:
-            cell.font = Font(bold=True, size=cell.font.size if cell.font else 11)
+            cell.font = BOLD_FONT
         if num_format:
             cell.number_format = num_format
-        elif number and isinstance(value, (int, float)):
-            cell.number_format = "0.00"
         if border_on:
-            cell.border = border
+            cell.border = BORDER
+        return cell
+
+    def merged_group(start_col: int, label: str, span: int) -> list:
+        """Label a merged group-row span; covered cells only carry the border."""
+        ws.merged_cells.add(CellRange(min_row=group_row, min_col=start_col, max_row=group_row, max_col=start_col + span - 1))
+        return [set_cell(label, align=GROUP_ALIGN, fill=GROUP_FILL, bold=True)] + [set_cell(None) for _ in range(span - 1)]
 
     # Top banner with course name and subtitle.
-    ws.merge_cells(start_row=title_row, start_column=1, end_row=title_row, end_column=total_columns_count)
-    top = ws.cell(row=title_row, column=1, value=f"{course_name}\nAssignment Grade Breakdown Per Criteria")
-    top.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    top.font = Font(bold=True, size=13)
-    top.fill = title_fill
-    top.border = border
+    ws.merged_cells.add(CellRange(min_row=title_row, min_col=1, max_row=title_row, max_col=total_columns_count))
+    top = set_cell(f"{course_name}\nAssignment Grade Breakdown Per Criteria", align=TITLE_ALIGN, fill=TITLE_FILL)
+    top.font = TITLE_FONT
+    title_cells = [top] + [set_cell(None) for _ in range(total_columns_count - 1)]
 
     # Names block
-    ws.merge_cells(start_row=group_row, start_column=1, end_row=group_row, end_column=2)
-    set_cell(ws.cell(row=group_row, column=1), "Students", align=group_alignment, fill=group_fill, bold=True)
-    set_cell(ws.cell(row=header_row, column=1), "First name", align=name_alignment, fill=header_fill, bold=True)
-    set_cell(ws.cell(row=header_row, column=2), "Last name", align=name_alignment, fill=header_fill, bold=True)
-
-    for idx, (first, last) in enumerate(roster):
-        row = data_start + idx
-        set_cell(ws.cell(row=row, column=1), first, align=name_alignment)
-        set_cell(ws.cell(row=row, column=2), last, align=name_alignment)
+    group_cells = merged_group(1, "Students", 2)
+    header_cells = [
+        set_cell("First name", align=NAME_ALIGN, fill=HEADER_FILL, bold=True),
+        set_cell("Last name", align=NAME_ALIGN, fill=HEADER_FILL, bold=True),
+    ]
 
     section_ends = [2]  # end of names block
     assignment_meta = []
@@ -370,34 +404,10 @@ def write_workbook(assignments: List[dict], roster: List[Tuple[str, str]], cours
     for assignment in assignments:
         df = assignment["df"]
         columns = assignment["write_columns"]
-        start_col = col_offset
-
-        # Write column headers with rotation
-        for idx, col_name in enumerate(columns):
-            set_cell(ws.cell(row=header_row, column=col_offset + idx), col_name, align=header_alignment, fill=header_fill, bold=True)
-
-        # Merge and label the assignment group above the criteria/totals.
-        merge_start = col_offset  # start at Criterion 1
-        merge_end = col_offset + len(columns) - 1  # through Total - Letter
-        if merge_start <= merge_end:
-            ws.merge_cells(start_row=group_row, start_column=merge_start, end_row=group_row, end_column=merge_end)
-            set_cell(
-                ws.cell(row=group_row, column=merge_start),
-                assignment["display_name"],
-                align=group_alignment,
-                fill=group_fill,
-                bold=True,
-            )
 
-        # Dump student rows.
-        for row_idx, (_, row) in enumerate(df.iterrows()):
-            for col_idx, col_name in enumerate(columns):
-                set_cell(
-                    ws.cell(row=data_start + row_idx, column=col_offset + col_idx),
-                    row[col_name],
-                    align=data_alignment,
-                    number=True,
-                )
+        # Label the assignment group above the criteria/totals, then the rotated column headers.
+        group_cells.extend(merged_group(col_offset, assignment["display_name"], len(columns)))
+        header_cells.extend(set_cell(col_name, align=HEADER_ALIGN, fill=HEADER_FILL, bold=True) for col_name in columns)
 
         section_ends.append(col_offset + len(columns) - 1)
         # Grade distribution counts per assignment from letter grades.
@@ -407,116 +417,154 @@ def write_workbook(assignments: List[dict], roster: List[Tuple[str, str]], cours
             key = letter[0] if letter else ""
             if key in buckets:
                 buckets[key] += 1
-        assignment_meta.append({"start_col": start_col, "display_name": assignment["display_name"], "buckets": buckets})
+        assignment_meta.append({"display_name": assignment["display_name"], "buckets": buckets})
         col_offset += len(columns)
 
     # Course total block
-    course_perc, course_letter = course_totals_for_roster(course_df, roster)
+    course_perc, course_letter = course_totals
     total_columns = ["Course total - 100", "Course total - Letter"]
-    ws.merge_cells(start_row=group_row, start_column=col_offset, end_row=group_row, end_column=col_offset + 1)
-    set_cell(ws.cell(row=group_row, column=col_offset), "Course Total", align=group_alignment, fill=group_fill, bold=True)
-
-    for idx, col_name in enumerate(total_columns):
-        set_cell(ws.cell(row=header_row, column=col_offset + idx), col_name, align=header_alignment, fill=header_fill, bold=True)
-    for row_idx, (perc, letter) in enumerate(zip(course_perc, course_letter)):
-        row_num = data_start + row_idx
-        for offset, value in enumerate((perc, letter)):
-            set_cell(ws.cell(row=row_num, column=col_offset + offset), value, align=data_alignment, number=True)
+    group_cells.extend(merged_group(col_offset, "Course Total", len(total_columns)))
+    header_cells.extend(set_cell(col_name, align=HEADER_ALIGN, fill=HEADER_FILL, bold=True) for col_name in total_columns)
     section_ends.append(col_offset + 1)
 
-    # Zebra striping for data rows.
-    max_col = ws.max_column
-    for row_idx in range(len(roster)):
-        if row_idx % 2 == 1:
-            row_num = data_start + row_idx
-            for col in range(1, max_col + 1):
-                ws.cell(row=row_num, column=col).fill = stripe_fill
-
-    # Styling tweaks
-    ws.freeze_panes = ws["C4"]
-
-    # Autosize columns to content (within bounds).
-    def autosize():
-        header_max_len = 0
-        for col in range(1, ws.max_column + 1):
-            max_len = 0
-            for cell in ws.iter_cols(min_col=col, max_col=col, min_row=1, max_row=ws.max_row):
-                for c in cell:
-                    if c.value is None:
-                        continue
-                    val = str(c.value).replace("\n", " ")
-                    max_len = max(max_len, len(val))
-                    if c.row in (title_row, group_row, header_row):
-                        header_max_len = max(header_max_len, len(val))
-            # Names columns get a wider default cap.
-            if col <= 2:
-                min_w, max_w = 16, 40
-            else:
-                min_w, max_w = 6, 24
-            width = max(min_w, max_len + 2)
-            width = min(width, max_w)
-            ws.column_dimensions[get_column_letter(col)].width = width
-
-        # Let Excel auto-fit row heights (clearing any prior overrides).
-        ws.row_dimensions[header_row].height = max(70, min(120, header_max_len * 2)) if HEADER_TEXT_ROTATION else None
-        ws.row_dimensions[group_row].height = ws.row_dimensions[group_row].height or 24
-        ws.row_dimensions[title_row].height = ws.row_dimensions[title_row].height or 32
-
-    # Add thick vertical separators between sections.
-    def add_thick_vertical(col_idx: int):
-        for row in range(1, ws.max_row + 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.border = Border(
-                left=cell.border.left,
-                right=thick,
-                top=cell.border.top,
-                bottom=cell.border.bottom,
-            )
+    # Rows are buffered in sheet order; column widths and the banner length are tracked as each row lands.
+    dist_labels = ["Assignment", "F", "D", "C", "B", "A"]
+    rows: List[list] = []
+    col_widths = [0] * max(total_columns_count, len(dist_labels))
+    header_max_len = 0
 
-    for end_col in section_ends:
-        add_thick_vertical(end_col)
+    def add_row(row_cells: list, banner: bool = False) -> None:
+        nonlocal header_max_len
+        for col_idx, cell in enumerate(row_cells):
+            if cell.value is None:
+                continue
+            length = len(str(cell.value).replace("\n", " "))
+            col_widths[col_idx] = max(col_widths[col_idx], length)
+            if banner:
+                header_max_len = max(header_max_len, length)
+        rows.append(row_cells)
+
+    def add_separators(row_cells: list) -> None:
+        # Thick vertical separators between sections (merged banner/group cells keep thin edges).
+        for end_col in section_ends:
+            row_cells[end_col - 1].border = RIGHT_THICK_BORDER
+
+    add_separators(header_cells)
+    for banner_cells in (title_cells, group_cells, header_cells):
+        add_row(banner_cells, banner=True)
+
+    # All data values side by side (assignment blocks, then course totals), with every
+    # missing value turned into None in one pass so cells never need a per-value NaN check.
+    blocks = [a["df"][a["write_columns"]] for a in assignments]
+    blocks.append(pd.DataFrame({"Course total - 100": course_perc, "Course total - Letter": course_letter}))
+    values = pd.concat(blocks, axis=1).astype(object)
+    value_grid = values.where(values.notna(), None).to_numpy()
+
+    # Number format is decided per column: everything is numeric except the letter grades.
+    data_columns = [col for a in assignments for col in a["write_columns"]] + total_columns
+    num_formats = [None if col in ("Total - Letter", "Course total - Letter") else "0.00" for col in data_columns]
+
+    # Dump student rows: each row is assembled once, left to right, across every block.
+    for row_idx, ((first, last), row_values) in enumerate(zip(roster, value_grid)):
+        row_fill = STRIPE_FILL if row_idx % 2 else None  # zebra striping
+        row_cells = [set_cell(first, align=NAME_ALIGN, fill=row_fill), set_cell(last, align=NAME_ALIGN, fill=row_fill)]
+        row_cells.extend(
+            set_cell(value, align=DATA_ALIGN, fill=row_fill, num_format=num_format)
+            for value, num_format in zip(row_values, num_formats)
+        )
+        add_separators(row_cells)
+        add_row(row_cells)
 
     # Grade distribution summary below the table (stacked rows).
-    dist_header_row = data_start + len(roster) + 1
-    dist_start_row = dist_header_row + 1
-    labels = ["Assignment", "F", "D", "C", "B", "A"]
-    for offset, label in enumerate(labels):
-        set_cell(
-            ws.cell(row=dist_header_row, column=offset + 1),
-            label,
-            align=dist_header_alignment,
-            fill=header_fill,
-            bold=True,
-        )
+    add_row([])
+    add_row([set_cell(label, align=DIST_HEADER_ALIGN, fill=HEADER_FILL, bold=True) for label in dist_labels])
     for meta in assignment_meta:
-        row_num = dist_start_row
-        set_cell(ws.cell(row=row_num, column=1), meta["display_name"], align=name_alignment, bold=True)
-        for idx, key in enumerate(["F", "D", "C", "B", "A"], start=1):
-            set_cell(ws.cell(row=row_num, column=idx + 1), meta["buckets"][key], align=data_alignment, num_format="0")
-        dist_start_row += 1
+        dist_row = [set_cell(meta["display_name"], align=NAME_ALIGN, bold=True)]
+        for key in ["F", "D", "C", "B", "A"]:
+            dist_row.append(set_cell(meta["buckets"][key], align=DATA_ALIGN, num_format="0"))
+        add_row(dist_row)
+
+    # Size columns to content (within bounds).
+    for col, max_len in enumerate(col_widths, start=1):
+        # Names columns get a wider default cap.
+        if col <= 2:
+            min_w, max_w = 16, 40
+        else:
+            min_w, max_w = 6, 24
+        width = max(min_w, max_len + 2)
+        width = min(width, max_w)
+        ws.column_dimensions[get_column_letter(col)].width = width
+    # Column-level default so values typed into blank cells of numeric columns match.
+    for col, num_format in enumerate(num_formats, start=3):
+        if num_format:
+            ws.column_dimensions[get_column_letter(col)].number_format = num_format
 
-    autosize()
+    ws.row_dimensions[header_row].height = max(70, min(120, header_max_len * 2)) if HEADER_TEXT_ROTATION else None
+    ws.row_dimensions[group_row].height = 24
+    ws.row_dimensions[title_row].height = 32
+
+    # Styling tweaks
+    ws.freeze_panes = "C4"
 
     # Page setup for PDF export: single page, landscape.
     ws.sheet_properties.pageSetUpPr.fitToPage = True
     ws.page_setup.fitToHeight = 1
     ws.page_setup.fitToWidth = 1
     ws.page_setup.orientation = "landscape"
-    ws.page_setup.paperSize = ws.PAPERSIZE_A4
+    ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
     ws.print_options.horizontalCentered = True
 
+    for row_cells in rows:
+        ws.append(row_cells)
+
     wb.save(output_path)
     return wb
 
 
+def unoserver_running(host: str = UNOSERVER_HOST, port: int = UNOSERVER_PORT) -> bool:
+    """Check whether a resident LibreOffice (unoserver) is listening."""
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
 def export_pdf(xlsx_path: Path, pdf_path: Path) -> bool:
-    """Export the XLSX to PDF via LibreOffice/soffice if available."""
+    """Export the XLSX to PDF via LibreOffice/soffice if available.
+
+    A running unoserver is used first so repeated runs share one LibreOffice process
+    instead of paying its start-up cost on every conversion.
+    """
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    unoconvert = shutil.which("unoconvert")
+    if unoconvert and unoserver_running():
+        try:
+            subprocess.run(
+                [
+                    unoconvert,
+                    "--host",
+                    UNOSERVER_HOST,
+                    "--port",
+                    str(UNOSERVER_PORT),
+                    "--convert-to",
+                    "pdf",
+                    str(xlsx_path),
+                    str(pdf_path),
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            return True
+        except subprocess.CalledProcessError:
+            print(f"PDF export via unoserver failed for {xlsx_path}; retrying with a one-shot LibreOffice.")
+
     soffice = shutil.which("soffice") or shutil.which("libreoffice")
     if not soffice:
         print(f"Skipping PDF export (LibreOffice/soffice not found). Intended path: {pdf_path}")
         return False
 
-    pdf_path.parent.mkdir(parents=True, exist_ok=True)
     try:
         subprocess.run(
             [
@@ -567,6 +615,12 @@ def main() -> None:
     parser.add_argument(
         "--output", default="consolidated.xlsx", help="Path for the consolidated workbook (default: consolidated.xlsx)."
     )
+    parser.add_argument(
+        "--pdf",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Also export a PDF next to the workbook via LibreOffice (default: off).",
+    )
     args = parser.parse_args()
 
     base_dir = Path(args.input_dir).expanduser().resolve()
@@ -574,17 +628,32 @@ def main() -> None:
 
     course_path, rubric_paths = list_assignment_files(base_dir)
     course_df = load_course_totals(course_path)
-    roster = build_roster(course_df, rubric_paths)
-    course_name = read_course_name(rubric_paths[0]) if rubric_paths else "Course"
+    # Index the course totals once; every assignment joins against the same frame.
+    course_indexed = course_df.set_index(["First name", "Last name"])
+    total_columns = course_total_columns(course_df)
+    grade_columns = index_grade_columns(course_df)
+    csv_index = {csv_path.stem: csv_path for csv_path in base_dir.glob("*.csv")}
+    # Rubric exports are independent, so each one is read and parsed in a worker process
+    # (map keeps the file order). The roster needs every export's names, so the course
+    # join and roster alignment happen back here once all workers are done.
+    load = partial(load_assignment, grade_columns=grade_columns, csv_index=csv_index)
+    workers = min(len(rubric_paths), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(load, rubric_paths))
+    else:
+        parsed = [load(path) for path in rubric_paths]
 
-    assignments = []
-    for path in rubric_paths:
-        assignment = parse_assignment(path, course_df, roster)
-        assignments.append(assignment)
+    roster = build_roster(course_df, [assignment.pop("names") for assignment in parsed])
+    course_name = parsed[0]["course_name"] if parsed else "Course"
+    assignments = [finish_assignment(assignment, course_indexed, roster) for assignment in parsed]
 
-    write_workbook(assignments, roster, course_df, course_name, output_path)
+    course_totals = course_totals_for_roster(course_indexed, total_columns, roster)
+    write_workbook(assignments, roster, course_totals, course_name, output_path)
     print(f"Wrote consolidated workbook to {output_path}")
 
+    if not args.pdf:
+        return
     pdf_path = output_path.with_suffix(".pdf")
     if export_pdf(output_path, pdf_path):
         print(f"Wrote PDF to {pdf_path}")
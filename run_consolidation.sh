@@ -18,7 +18,7 @@ source .venv/bin/activate
 python -m pip install --upgrade pip >/dev/null
 pip install -r requirements.txt
 
-python consolidate_grades.py --input-dir "${INPUT_DIR}" --output "${OUTPUT_PATH}"
+python consolidate_grades.py --input-dir "${INPUT_DIR}" --output "${OUTPUT_PATH}" --pdf
 
 deactivate
 echo "Consolidation complete. Output: ${OUTPUT_PATH}"